@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 from pathlib import Path
@@ -88,4 +89,9 @@ async def create_app():
 if __name__ == "__main__":
     host = "localhost"
     port = 8765
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        logger.info("uvloop not available, using the default asyncio event loop")
     web.run_app(create_app(), host=host, port=port)
@@ -5,12 +5,19 @@ from enum import Enum
 from typing import Any, Callable, Optional
 
 import aiohttp
+import orjson
 from aiohttp import web
 from azure.core.credentials import AzureKeyCredential
 from azure.identity import DefaultAzureCredential, get_bearer_token_provider
 
 logger = logging.getLogger("voicerag")
 
+# Upstream audio deltas are relayed untouched and make up most of the traffic. When the service
+# serialises the type first, the event is recognised by its prefix so the base64 payload is never
+# parsed; anything else falls through to the full parse. Client messages are always parsed, since
+# the browser controls their text and must not be able to bypass the server-enforced session settings.
+_AUDIO_DELTA_PREFIX = '{"type":"response.audio.delta"'
+
 class ToolResultDirection(Enum):
     TO_SERVER = 1
     TO_CLIENT = 2
@@ -62,8 +69,14 @@ class RTMiddleTier:
     disable_audio: Optional[bool] = None
     voice_choice: Optional[str] = None
     api_version: str = "2024-10-01-preview"
+    # Client messages buffered per connection before reading from the client waits on the upstream socket
+    send_queue_size: int = 64
+    # Cap on concurrent upstream connections across all clients; 0 means unlimited
+    upstream_connection_limit: int = 0
     _tools_pending = {}
     _token_provider = None
+    _session: Optional[aiohttp.ClientSession] = None
+    _session_overrides: dict[str, Any] = {}
 
     def __init__(self, endpoint: str, deployment: str, credentials: AzureKeyCredential | DefaultAzureCredential, voice_choice: Optional[str] = None):
         self.endpoint = endpoint
@@ -78,7 +91,9 @@ class RTMiddleTier:
             self._token_provider() # Warm up during startup so we have a token cached when the first request arrives
 
     async def _process_message_to_client(self, msg: str, client_ws: web.WebSocketResponse, server_ws: web.WebSocketResponse) -> Optional[str]:
-        message = json.loads(msg.data)
+        if msg.data.startswith(_AUDIO_DELTA_PREFIX):
+            return msg.data
+        message = orjson.loads(msg.data)
         updated_message = msg.data
         if message is not None:
             match message["type"]:
@@ -118,7 +133,7 @@ class RTMiddleTier:
                         tool_call = self._tools_pending[message["item"]["call_id"]]
                         tool = self.tools[item["name"]]
                         args = item["arguments"]
-                        result = await tool.target(json.loads(args))
+                        result = await tool.target(orjson.loads(args))
                         await server_ws.send_json({
                             "type": "conversation.item.create",
                             "item": {
@@ -155,74 +170,111 @@ class RTMiddleTier:
 
         return updated_message
 
+    def _build_session_overrides(self) -> dict[str, Any]:
+        overrides = {}
+        if self.system_message is not None:
+            overrides["instructions"] = self.system_message
+        if self.temperature is not None:
+            overrides["temperature"] = self.temperature
+        if self.max_tokens is not None:
+            overrides["max_response_output_tokens"] = self.max_tokens
+        if self.disable_audio is not None:
+            overrides["disable_audio"] = self.disable_audio
+        if self.voice_choice is not None:
+            overrides["voice"] = self.voice_choice
+        overrides["tool_choice"] = "auto" if len(self.tools) > 0 else "none"
+        overrides["tools"] = [tool.schema for tool in self.tools.values()]
+        return overrides
+
     async def _process_message_to_server(self, msg: str, ws: web.WebSocketResponse) -> Optional[str]:
-        message = json.loads(msg.data)
+        message = orjson.loads(msg.data)
         updated_message = msg.data
         if message is not None:
             match message["type"]:
                 case "session.update":
-                    session = message["session"]
-                    if self.system_message is not None:
-                        session["instructions"] = self.system_message
-                    if self.temperature is not None:
-                        session["temperature"] = self.temperature
-                    if self.max_tokens is not None:
-                        session["max_response_output_tokens"] = self.max_tokens
-                    if self.disable_audio is not None:
-                        session["disable_audio"] = self.disable_audio
-                    if self.voice_choice is not None:
-                        session["voice"] = self.voice_choice
-                    session["tool_choice"] = "auto" if len(self.tools) > 0 else "none"
-                    session["tools"] = [tool.schema for tool in self.tools.values()]
+                    message["session"].update(self._session_overrides)
                     updated_message = json.dumps(message)
 
         return updated_message
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        # One client session for all connections so they share the connector's DNS cache (10 s TTL). That is
+        # the only saving: aiohttp already caches the default SSLContext, asyncio doesn't resume client TLS
+        # sessions, and upgraded websockets are closed rather than returned to the pool.
+        # An upgraded websocket holds its connector slot until it closes, so the connector's default
+        # limit of 100 would cap concurrent realtime sessions per worker; it is unlimited by default.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.upstream_connection_limit)
+            self._session = aiohttp.ClientSession(base_url=self.endpoint, connector=connector)
+        return self._session
+
+    async def _close_session(self, app: web.Application):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
     async def _forward_messages(self, ws: web.WebSocketResponse):
-        async with aiohttp.ClientSession(base_url=self.endpoint) as session:
-            params = { "api-version": self.api_version, "deployment": self.deployment}
-            headers = {}
-            if "x-ms-client-request-id" in ws.headers:
-                headers["x-ms-client-request-id"] = ws.headers["x-ms-client-request-id"]
-            if self.key is not None:
-                headers = { "api-key": self.key }
-            else:
-                headers = { "Authorization": f"Bearer {self._token_provider()}" } # NOTE: no async version of token provider, maybe refresh token on a timer?
-            async with session.ws_connect("/openai/realtime", headers=headers, params=params) as target_ws:
-                async def from_client_to_server():
-                    async for msg in ws:
-                        if msg.type == aiohttp.WSMsgType.TEXT:
-                            new_msg = await self._process_message_to_server(msg, ws)
-                            if new_msg is not None:
-                                await target_ws.send_str(new_msg)
-                        else:
-                            print("Error: unexpected message type:", msg.type)
-                    
-                    # Means it is gracefully closed by the client then time to close the target_ws
-                    if target_ws:
-                        print("Closing OpenAI's realtime socket connection.")
-                        await target_ws.close()
-                        
-                async def from_server_to_client():
-                    async for msg in target_ws:
-                        if msg.type == aiohttp.WSMsgType.TEXT:
-                            new_msg = await self._process_message_to_client(msg, ws, target_ws)
-                            if new_msg is not None:
-                                await ws.send_str(new_msg)
-                        else:
-                            print("Error: unexpected message type:", msg.type)
-
-                try:
-                    await asyncio.gather(from_client_to_server(), from_server_to_client())
-                except ConnectionResetError:
-                    # Ignore the errors resulting from the client disconnecting the socket
-                    pass
+        session = self._get_session()
+        params = { "api-version": self.api_version, "deployment": self.deployment}
+        headers = {}
+        if "x-ms-client-request-id" in ws.headers:
+            headers["x-ms-client-request-id"] = ws.headers["x-ms-client-request-id"]
+        if self.key is not None:
+            headers = { "api-key": self.key }
+        else:
+            headers = { "Authorization": f"Bearer {self._token_provider()}" } # NOTE: no async version of token provider, maybe refresh token on a timer?
+        async with session.ws_connect("/openai/realtime", headers=headers, params=params, compress=0) as target_ws:
+            # Client messages are handed to a dedicated writer so reading from the client isn't
+            # held up while the upstream socket drains; None marks the end of the client stream
+            to_server: asyncio.Queue[Optional[str]] = asyncio.Queue(maxsize=self.send_queue_size)
+
+            async def from_client_to_server():
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        new_msg = await self._process_message_to_server(msg, ws)
+                        if new_msg is not None:
+                            await to_server.put(new_msg)
+                    else:
+                        print("Error: unexpected message type:", msg.type)
+                await to_server.put(None)
+
+            async def send_to_server():
+                while (new_msg := await to_server.get()) is not None:
+                    await target_ws.send_str(new_msg)
+
+                # Means it is gracefully closed by the client then time to close the target_ws
+                if target_ws:
+                    print("Closing OpenAI's realtime socket connection.")
+                    await target_ws.close()
+
+            async def from_server_to_client():
+                async for msg in target_ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        new_msg = await self._process_message_to_client(msg, ws, target_ws)
+                        if new_msg is not None:
+                            await ws.send_str(new_msg)
+                    else:
+                        print("Error: unexpected message type:", msg.type)
+
+            try:
+                # The TaskGroup cancels the remaining relay tasks if one of them fails
+                async with asyncio.TaskGroup() as tg:
+                    tg.create_task(from_client_to_server())
+                    tg.create_task(send_to_server())
+                    tg.create_task(from_server_to_client())
+            except* ConnectionResetError:
+                # Ignore the errors resulting from the client disconnecting the socket
+                pass
 
     async def _websocket_handler(self, request: web.Request):
-        ws = web.WebSocketResponse()
+        # Audio frames are base64 PCM that barely compresses, so don't negotiate permessage-deflate
+        ws = web.WebSocketResponse(compress=False)
         await ws.prepare(request)
         await self._forward_messages(ws)
         return ws
     
     def attach_to_app(self, app, path):
+        # Server-enforced settings are captured here, so configure the instance before attaching it
+        self._session_overrides = self._build_session_overrides()
         app.router.add_get(path, self._websocket_handler)
+        app.on_cleanup.append(self._close_session)
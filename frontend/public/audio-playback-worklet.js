@@ -2,28 +2,53 @@ class AudioPlaybackWorklet extends AudioWorkletProcessor {
     constructor() {
         super();
         this.port.onmessage = this.handleMessage.bind(this);
-        this.buffer = [];
+        // Queue of Int16Array chunks; `head` indexes the next chunk to play so
+        // consuming from the front is O(1) instead of re-slicing the whole buffer.
+        // `offset` is the read position inside the head chunk.
+        this.queue = [];
+        this.head = 0;
+        this.offset = 0;
     }
 
     handleMessage(event) {
         if (event.data === null) {
-            this.buffer = [];
+            this.queue = [];
+            this.head = 0;
+            this.offset = 0;
             return;
         }
-        this.buffer.push(...event.data);
+        this.queue.push(event.data);
     }
 
     process(inputs, outputs, parameters) {
         const output = outputs[0];
         const channel = output[0];
 
-        if (this.buffer.length > channel.length) {
-            const toProcess = this.buffer.slice(0, channel.length);
-            this.buffer = this.buffer.slice(channel.length);
-            channel.set(toProcess.map(v => v / 32768));
-        } else {
-            channel.set(this.buffer.map(v => v / 32768));
-            this.buffer = [];
+        // Write straight into the output channel instead of building a temporary array
+        let fill = 0;
+        while (fill < channel.length && this.head < this.queue.length) {
+            const chunk = this.queue[this.head];
+            const n = Math.min(chunk.length - this.offset, channel.length - fill);
+            for (let i = 0; i < n; i++) {
+                channel[fill + i] = chunk[this.offset + i] / 32768;
+            }
+            fill += n;
+            this.offset += n;
+            if (this.offset === chunk.length) {
+                this.head++;
+                this.offset = 0;
+            }
+        }
+        if (fill < channel.length) {
+            channel.fill(0, fill);
+        }
+
+        if (this.head === this.queue.length) {
+            this.queue = [];
+            this.head = 0;
+        } else if (this.head > 1024) {
+            this.queue.splice(0, this.head);
+            this.head = 0;
         }
 
         return true;
@@ -1,29 +1,42 @@
 const MIN_INT16 = -0x8000;
 const MAX_INT16 = 0x7fff;
+// Post to the main thread every 100 ms (at 24 kHz) rather than on every 128-frame render quantum
+const BATCH_SAMPLES = 2400;
 
 class PCMAudioProcessor extends AudioWorkletProcessor {
     constructor() {
         super();
+        this.batch = new Int16Array(BATCH_SAMPLES);
+        this.fill = 0;
     }
 
     process(inputs, outputs, parameters) {
         const input = inputs[0];
         if (input.length > 0) {
             const float32Buffer = input[0];
-            const int16Buffer = this.float32ToInt16(float32Buffer);
-            this.port.postMessage(int16Buffer);
+            let read = 0;
+            while (read < float32Buffer.length) {
+                const n = Math.min(float32Buffer.length - read, BATCH_SAMPLES - this.fill);
+                this.float32ToInt16(float32Buffer.subarray(read, read + n), this.batch, this.fill);
+                this.fill += n;
+                read += n;
+
+                if (this.fill === BATCH_SAMPLES) {
+                    // Transfer the batch rather than cloning it
+                    this.port.postMessage(this.batch, [this.batch.buffer]);
+                    this.batch = new Int16Array(BATCH_SAMPLES);
+                    this.fill = 0;
+                }
+            }
         }
         return true;
     }
 
-    float32ToInt16(float32Array) {
-        const int16Array = new Int16Array(float32Array.length);
+    float32ToInt16(float32Array, int16Array, offset) {
         for (let i = 0; i < float32Array.length; i++) {
-            let val = Math.floor(float32Array[i] * MAX_INT16);
-            val = Math.max(MIN_INT16, Math.min(MAX_INT16, val));
-            int16Array[i] = val;
+            const val = float32Array[i] * MAX_INT16;
+            int16Array[offset + i] = val >= MAX_INT16 ? MAX_INT16 : val <= MIN_INT16 ? MIN_INT16 : Math.floor(val);
         }
-        return int16Array;
     }
 }
 
@@ -11,7 +11,9 @@ export class Player {
 
     play(buffer: Int16Array) {
         if (this.playbackNode) {
-            this.playbackNode.port.postMessage(buffer);
+            // Transfer ownership of the samples to the worklet instead of structured-cloning them;
+            // the caller must not use the buffer afterwards
+            this.playbackNode.port.postMessage(buffer, [buffer.buffer]);
         }
     }
 
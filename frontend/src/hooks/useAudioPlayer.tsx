@@ -14,8 +14,12 @@ export default function useAudioPlayer() {
 
     const play = (base64Audio: string) => {
         const binary = atob(base64Audio);
-        const bytes = Uint8Array.from(binary, c => c.charCodeAt(0));
-        const pcmData = new Int16Array(bytes.buffer);
+        // Decode straight into the sample buffer; Uint8Array.from with a mapper goes through the iterator protocol
+        const pcmData = new Int16Array(binary.length >> 1);
+        const bytes = new Uint8Array(pcmData.buffer);
+        for (let i = 0; i < bytes.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
 
         audioPlayer.current?.play(pcmData);
     };
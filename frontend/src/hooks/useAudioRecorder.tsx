@@ -10,27 +10,28 @@ type Parameters = {
 export default function useAudioRecorder({ onAudioRecorded }: Parameters) {
     const audioRecorder = useRef<Recorder>();
 
-    let buffer = new Uint8Array();
-
-    const appendToBuffer = (newData: Uint8Array) => {
-        const newBuffer = new Uint8Array(buffer.length + newData.length);
-        newBuffer.set(buffer);
-        newBuffer.set(newData, buffer.length);
-        buffer = newBuffer;
-    };
+    // Batch capture into 100 ms (BUFFER_SIZE bytes) messages, filling a single
+    // preallocated buffer instead of reallocating on every worklet callback.
+    const buffer = new Uint8Array(BUFFER_SIZE);
+    let fill = 0;
 
     const handleAudioData = (data: Iterable<number>) => {
         const uint8Array = new Uint8Array(data);
-        appendToBuffer(uint8Array);
 
-        if (buffer.length >= BUFFER_SIZE) {
-            const toSend = new Uint8Array(buffer.slice(0, BUFFER_SIZE));
-            buffer = new Uint8Array(buffer.slice(BUFFER_SIZE));
+        let read = 0;
+        while (read < uint8Array.length) {
+            const n = Math.min(uint8Array.length - read, BUFFER_SIZE - fill);
+            buffer.set(uint8Array.subarray(read, read + n), fill);
+            fill += n;
+            read += n;
 
-            const regularArray = String.fromCharCode(...toSend);
-            const base64 = btoa(regularArray);
+            if (fill === BUFFER_SIZE) {
+                const regularArray = String.fromCharCode(...buffer);
+                const base64 = btoa(regularArray);
 
-            onAudioRecorded(base64);
+                onAudioRecorded(base64);
+                fill = 0;
+            }
         }
     };
 
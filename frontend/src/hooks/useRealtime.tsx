@@ -1,7 +1,6 @@
 import useWebSocket from "react-use-websocket";
 
 import {
-    InputAudioBufferAppendCommand,
     InputAudioBufferClearCommand,
     Message,
     ResponseAudioDelta,
@@ -12,6 +11,11 @@ import {
     ResponseInputAudioTranscriptionCompleted
 } from "@/types";
 
+// input_audio_buffer.append is sent every 100 ms and only the audio changes. Base64 never
+// needs JSON escaping, so the envelope is built once and the payload spliced in.
+const APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"';
+const APPEND_SUFFIX = '"}';
+
 type Parameters = {
     useDirectAoaiApi?: boolean; // If true, the middle tier will be skipped and the AOAI ws API will be called directly
     aoaiEndpointOverride?: string;
@@ -55,7 +59,7 @@ export default function useRealTime({
         ? `${aoaiEndpointOverride}/openai/realtime?api-key=${aoaiApiKeyOverride}&deployment=${aoaiModelOverride}&api-version=2024-10-01-preview`
         : `/realtime`;
 
-    const { sendJsonMessage } = useWebSocket(wsEndpoint, {
+    const { sendMessage, sendJsonMessage } = useWebSocket(wsEndpoint, {
         onOpen: () => onWebSocketOpen?.(),
         onClose: () => onWebSocketClose?.(),
         onError: event => onWebSocketError?.(event),
@@ -83,12 +87,7 @@ export default function useRealTime({
     };
 
     const addUserAudio = (base64Audio: string) => {
-        const command: InputAudioBufferAppendCommand = {
-            type: "input_audio_buffer.append",
-            audio: base64Audio
-        };
-
-        sendJsonMessage(command);
+        sendMessage(APPEND_PREFIX + base64Audio + APPEND_SUFFIX);
     };
 
     const inputAudioBufferClear = () => {